@@ -546,8 +546,7 @@ class ForcedBOSTokenLogitsProcessor(LogitsProcessor):
     def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
         cur_len = input_ids.shape[-1]
         if cur_len == 1:
-            num_tokens = scores.shape[1]
-            scores[:, [i for i in range(num_tokens) if i != self.bos_token_id]] = -float("inf")
+            scores.fill_(-float("inf"))
             scores[:, self.bos_token_id] = 0
         return scores
 
@@ -571,8 +570,7 @@ class ForcedEOSTokenLogitsProcessor(LogitsProcessor):
     def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
         cur_len = input_ids.shape[-1]
         if cur_len == self.max_length - 1:
-            num_tokens = scores.shape[1]
-            scores[:, [i for i in range(num_tokens) if i != self.eos_token_id]] = -float("inf")
+            scores.fill_(-float("inf"))
             scores[:, self.eos_token_id] = 0
         return scores
 
@@ -586,9 +584,9 @@ class InfNanRemoveLogitsProcessor(LogitsProcessor):
 
     def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
         # set all nan values to 0.0
-        scores[scores != scores] = 0.0
+        scores.masked_fill_(scores != scores, 0.0)
 
         # set all inf values to max possible value
-        scores[scores == float("inf")] = torch.finfo(scores.dtype).max
+        scores.masked_fill_(scores == float("inf"), torch.finfo(scores.dtype).max)
 
         return scores
@@ -87,6 +87,10 @@ class BlenderbotConfig(PretrainedConfig):
         forced_eos_token_id (:obj:`int`, `optional`, defaults to 2):
             The id of the token to force as the last generated token when :obj:`max_length` is reached. Usually set to
             :obj:`eos_token_id`.
+        attn_implementation (:obj:`str`, `optional`, defaults to :obj:`"eager"`):
+            The attention implementation to use. One of :obj:`"eager"` or :obj:`"sdpa"`. :obj:`"sdpa"` uses
+            :func:`torch.nn.functional.scaled_dot_product_attention` (PyTorch >= 2.0), which runs a fused /
+            memory-efficient attention kernel when one is available for the inputs.
 
     Example::
 
@@ -133,8 +137,14 @@ class BlenderbotConfig(PretrainedConfig):
         eos_token_id=2,
         encoder_no_repeat_ngram_size=3,
         forced_eos_token_id=2,
+        attn_implementation="eager",
         **kwargs
     ):
+        if attn_implementation not in ("eager", "sdpa"):
+            raise ValueError(
+                f"`attn_implementation` should be one of 'eager' or 'sdpa', but is {attn_implementation!r}."
+            )
+
         super().__init__(
             pad_token_id=pad_token_id,
             bos_token_id=bos_token_id,
@@ -167,6 +177,7 @@ class BlenderbotConfig(PretrainedConfig):
         self.num_hidden_layers = encoder_layers
         self.gradient_checkpointing = gradient_checkpointing
         self.scale_embedding = scale_embedding  # scale factor will be sqrt(d_model) if True
+        self.attn_implementation = attn_implementation
 
     @property
     def num_attention_heads(self) -> int:
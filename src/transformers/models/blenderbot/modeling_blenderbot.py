@@ -76,16 +76,15 @@ def shift_tokens_right(input_ids: torch.Tensor, pad_token_id: int, decoder_start
     return shifted_input_ids
 
 
-# Copied from transformers.models.bart.modeling_bart._make_causal_mask
 def _make_causal_mask(input_ids_shape: torch.Size, dtype: torch.dtype, past_key_values_length: int = 0):
     """
     Make causal mask used for bi-directional self-attention.
     """
     bsz, tgt_len = input_ids_shape
-    mask = torch.full((tgt_len, tgt_len), float("-inf"))
+    # fill with the same value as `_expand_mask`, the most negative finite value of `dtype` (correct for fp16/bf16)
+    mask = torch.full((tgt_len, tgt_len), torch.finfo(dtype).min, dtype=dtype)
     mask_cond = torch.arange(mask.size(-1))
     mask.masked_fill_(mask_cond < (mask_cond + 1).view(mask.size(-1), 1), 0)
-    mask = mask.to(dtype)
 
     if past_key_values_length > 0:
         mask = torch.cat([torch.zeros(tgt_len, past_key_values_length, dtype=dtype), mask], dim=-1)
@@ -262,12 +261,100 @@ class BlenderbotAttention(nn.Module):
         return attn_output, attn_weights_reshaped, past_key_value
 
 
-# Copied from transformers.models.mbart.modeling_mbart.MBartEncoderLayer with MBart->Blenderbot
+class BlenderbotSdpaAttention(BlenderbotAttention):
+    """
+    Blenderbot attention computed with :func:`torch.nn.functional.scaled_dot_product_attention`, which runs a fused /
+    memory-efficient kernel when one is available for the inputs. The additive attention mask is always passed
+    explicitly, so the FlashAttention backend (which only supports masks given through ``is_causal``) is not used.
+    Falls back to :class:`BlenderbotAttention` when attention weights or a head mask are requested, or when the
+    installed PyTorch does not provide it.
+    """
+
+    def forward(
+        self,
+        hidden_states: torch.Tensor,
+        key_value_states: Optional[torch.Tensor] = None,
+        past_key_value: Optional[Tuple[torch.Tensor]] = None,
+        attention_mask: Optional[torch.Tensor] = None,
+        layer_head_mask: Optional[torch.Tensor] = None,
+        output_attentions: bool = False,
+    ) -> Tuple[torch.Tensor, Optional[torch.Tensor], Optional[Tuple[torch.Tensor]]]:
+        """Input shape: Batch x Time x Channel"""
+        if output_attentions or layer_head_mask is not None or not hasattr(F, "scaled_dot_product_attention"):
+            return super().forward(
+                hidden_states,
+                key_value_states=key_value_states,
+                past_key_value=past_key_value,
+                attention_mask=attention_mask,
+                layer_head_mask=layer_head_mask,
+                output_attentions=output_attentions,
+            )
+
+        is_cross_attention = key_value_states is not None
+        bsz, tgt_len, embed_dim = hidden_states.size()
+
+        # get query proj, scaled_dot_product_attention applies the 1 / sqrt(head_dim) scaling itself
+        query_states = self._shape(self.q_proj(hidden_states), tgt_len, bsz)
+        # get key, value proj
+        if is_cross_attention and past_key_value is not None:
+            # reuse k,v, cross_attentions
+            key_states = past_key_value[0]
+            value_states = past_key_value[1]
+        elif is_cross_attention:
+            # cross_attentions
+            key_states = self._shape(self.k_proj(key_value_states), -1, bsz)
+            value_states = self._shape(self.v_proj(key_value_states), -1, bsz)
+        elif past_key_value is not None:
+            # reuse k, v, self_attention
+            key_states = self._shape(self.k_proj(hidden_states), -1, bsz)
+            value_states = self._shape(self.v_proj(hidden_states), -1, bsz)
+            key_states = torch.cat([past_key_value[0], key_states], dim=2)
+            value_states = torch.cat([past_key_value[1], value_states], dim=2)
+        else:
+            # self_attention
+            key_states = self._shape(self.k_proj(hidden_states), -1, bsz)
+            value_states = self._shape(self.v_proj(hidden_states), -1, bsz)
+
+        if self.is_decoder:
+            past_key_value = (key_states, value_states)
+
+        src_len = key_states.size(2)
+        if attention_mask is not None:
+            if attention_mask.size() != (bsz, 1, tgt_len, src_len):
+                raise ValueError(
+                    f"Attention mask should be of size {(bsz, 1, tgt_len, src_len)}, but is {attention_mask.size()}"
+                )
+            # masks are built in the embeddings dtype, under autocast the projections can be lower precision
+            attention_mask = attention_mask.to(query_states.dtype)
+
+        # the additive mask broadcasts over the heads dimension
+        attn_output = F.scaled_dot_product_attention(
+            query_states,
+            key_states,
+            value_states,
+            attn_mask=attention_mask,
+            dropout_p=self.dropout if self.training else 0.0,
+        )
+
+        attn_output = attn_output.transpose(1, 2)
+        attn_output = attn_output.reshape(bsz, tgt_len, embed_dim)
+
+        attn_output = self.out_proj(attn_output)
+
+        return attn_output, None, past_key_value
+
+
+BLENDERBOT_ATTENTION_CLASSES = {
+    "eager": BlenderbotAttention,
+    "sdpa": BlenderbotSdpaAttention,
+}
+
+
 class BlenderbotEncoderLayer(nn.Module):
     def __init__(self, config: BlenderbotConfig):
         super().__init__()
         self.embed_dim = config.d_model
-        self.self_attn = BlenderbotAttention(
+        self.self_attn = BLENDERBOT_ATTENTION_CLASSES[config.attn_implementation](
             embed_dim=self.embed_dim,
             num_heads=config.encoder_attention_heads,
             dropout=config.attention_dropout,
@@ -331,13 +418,13 @@ class BlenderbotEncoderLayer(nn.Module):
         return outputs
 
 
-# Copied from transformers.models.mbart.modeling_mbart.MBartDecoderLayer with MBart->Blenderbot
 class BlenderbotDecoderLayer(nn.Module):
     def __init__(self, config: BlenderbotConfig):
         super().__init__()
         self.embed_dim = config.d_model
+        attention_class = BLENDERBOT_ATTENTION_CLASSES[config.attn_implementation]
 
-        self.self_attn = BlenderbotAttention(
+        self.self_attn = attention_class(
             embed_dim=self.embed_dim,
             num_heads=config.decoder_attention_heads,
             dropout=config.attention_dropout,
@@ -348,7 +435,7 @@ class BlenderbotDecoderLayer(nn.Module):
         self.activation_dropout = config.activation_dropout
 
         self.self_attn_layer_norm = nn.LayerNorm(self.embed_dim)
-        self.encoder_attn = BlenderbotAttention(
+        self.encoder_attn = attention_class(
             self.embed_dim,
             config.decoder_attention_heads,
             dropout=config.attention_dropout,
@@ -801,6 +888,8 @@ class BlenderbotDecoder(BlenderbotPreTrainedModel):
         )
         self.layers = nn.ModuleList([BlenderbotDecoderLayer(config) for _ in range(config.decoder_layers)])
         self.layer_norm = nn.LayerNorm(config.d_model)
+        # full-size causal mask, sliced per call in `_prepare_decoder_attention_mask`
+        self._causal_mask = None
 
         self.init_weights()
 
@@ -810,15 +899,32 @@ class BlenderbotDecoder(BlenderbotPreTrainedModel):
     def set_input_embeddings(self, value):
         self.embed_tokens = value
 
-    # Copied from transformers.models.bart.modeling_bart.BartDecoder._prepare_decoder_attention_mask
+    def _get_causal_mask(self, input_shape, dtype, device, past_key_values_length):
+        bsz, tgt_len = input_shape
+        src_len = tgt_len + past_key_values_length
+        # a traced graph must not depend on whether the mask was already cached
+        if src_len > self.max_target_positions or torch.jit.is_tracing():
+            return _make_causal_mask(input_shape, dtype, past_key_values_length=past_key_values_length).to(device)
+
+        # build the mask for the longest possible target once, every (tgt_len, past_key_values_length) is a slice of
+        # it. Only one mask is kept, so moving or casting the model releases the previous copy.
+        causal_mask = self._causal_mask
+        if causal_mask is None or causal_mask.dtype != dtype or causal_mask.device != device:
+            causal_mask = _make_causal_mask((1, self.max_target_positions), dtype)[0, 0].to(device)
+            self._causal_mask = causal_mask
+
+        causal_mask = causal_mask[past_key_values_length:src_len, :src_len]
+        return causal_mask[None, None, :, :].expand(bsz, 1, tgt_len, src_len)
+
     def _prepare_decoder_attention_mask(self, attention_mask, input_shape, inputs_embeds, past_key_values_length):
         # create causal mask
         # [bsz, seq_len] -> [bsz, 1, tgt_seq_len, src_seq_len]
         combined_attention_mask = None
         if input_shape[-1] > 1:
-            combined_attention_mask = _make_causal_mask(
-                input_shape, inputs_embeds.dtype, past_key_values_length=past_key_values_length
-            ).to(self.device)
+            # take the device from the embeddings, `self.device` walks the parameters on every call
+            combined_attention_mask = self._get_causal_mask(
+                input_shape, inputs_embeds.dtype, inputs_embeds.device, past_key_values_length
+            )
 
         if attention_mask is not None:
             # [bsz, seq_len] -> [bsz, 1, tgt_seq_len, src_seq_len]
@@ -1296,8 +1402,8 @@ class BlenderbotForConditionalGeneration(BlenderbotPreTrainedModel):
 
         masked_lm_loss = None
         if labels is not None:
-            loss_fct = CrossEntropyLoss()
-            masked_lm_loss = loss_fct(lm_logits.view(-1, self.config.vocab_size), labels.view(-1))
+            # the logits may be half precision, reduce them in float32 for a stable log_softmax
+            masked_lm_loss = F.cross_entropy(lm_logits.float().view(-1, self.config.vocab_size), labels.view(-1))
 
         if not return_dict:
             output = (lm_logits,) + outputs[1:]
@@ -14,6 +14,7 @@
 # limitations under the License.
 """ Testing suite for the PyTorch Blenderbot model. """
 
+import copy
 import tempfile
 import unittest
 
@@ -206,6 +207,70 @@ class BlenderbotModelTester:
 
         self.parent.assertTrue((last_hidden_state_2 - last_hidden_state).abs().max().item() < 1e-3)
 
+    def check_model_forward_after_dtype_cast(self, config, inputs_dict):
+        model = BlenderbotForConditionalGeneration(config=config).to(torch_device).eval()
+        decoder = model.get_decoder()
+
+        # head masks are float32, keep them out so the inputs work for every dtype
+        inputs = {k: v for k, v in inputs_dict.items() if not k.endswith("head_mask")}
+        logits = model(**inputs).logits
+        self.parent.assertEqual(decoder._causal_mask.dtype, torch.float32)
+
+        # the cached causal mask is rebuilt when the dtype changes
+        model.double()
+        double_logits = model(**inputs).logits
+        self.parent.assertEqual(double_logits.dtype, torch.float64)
+        self.parent.assertEqual(decoder._causal_mask.dtype, torch.float64)
+        self.parent.assertTrue(torch.allclose(logits.double(), double_logits, atol=1e-4))
+        model.generate(inputs["input_ids"], attention_mask=inputs["attention_mask"], num_beams=2, max_length=10)
+
+        model.float()
+        float_logits = model(**inputs).logits
+        self.parent.assertEqual(decoder._causal_mask.dtype, torch.float32)
+        self.parent.assertTrue(torch.allclose(logits, float_logits, atol=1e-4))
+
+    def check_sdpa_attention_matches_eager(self, config, inputs_dict):
+        model = BlenderbotForConditionalGeneration(config=config).to(torch_device).eval()
+
+        sdpa_config = copy.deepcopy(config)
+        sdpa_config.attn_implementation = "sdpa"
+        sdpa_model = BlenderbotForConditionalGeneration(config=sdpa_config).to(torch_device).eval()
+        sdpa_model.load_state_dict(model.state_dict())
+
+        # head masks force the eager fallback, so leave them out
+        inputs = {k: v for k, v in inputs_dict.items() if not k.endswith("head_mask")}
+        outputs = model(**inputs, use_cache=True)
+        sdpa_outputs = sdpa_model(**inputs, use_cache=True)
+
+        self.parent.assertTrue(torch.allclose(outputs.logits, sdpa_outputs.logits, atol=1e-4))
+
+        # next step reuses the cached self-attention and cross-attention key/value states
+        next_tokens = ids_tensor((self.batch_size, 1), config.vocab_size)
+        next_inputs = {
+            "decoder_input_ids": next_tokens,
+            "attention_mask": inputs["attention_mask"],
+            "encoder_outputs": (outputs.encoder_last_hidden_state,),
+        }
+        next_logits = model(**next_inputs, past_key_values=outputs.past_key_values).logits
+        sdpa_next_logits = sdpa_model(**next_inputs, past_key_values=sdpa_outputs.past_key_values).logits
+
+        self.parent.assertTrue(torch.allclose(next_logits, sdpa_next_logits, atol=1e-4))
+
+        # beam search goes through `_reorder_cache`
+        generate_kwargs = {"attention_mask": inputs["attention_mask"], "num_beams": 2, "max_length": 10}
+        generated = model.generate(inputs["input_ids"], **generate_kwargs)
+        sdpa_generated = sdpa_model.generate(inputs["input_ids"], **generate_kwargs)
+
+        self.parent.assertListEqual(generated.tolist(), sdpa_generated.tolist())
+
+        # under autocast the projections run in lower precision than the float32 masks
+        autocast_dtype = torch.float16 if torch_device == "cuda" else torch.bfloat16
+        with torch.autocast(device_type=torch_device, dtype=autocast_dtype):
+            autocast_logits = model(**inputs).logits
+            sdpa_autocast_logits = sdpa_model(**inputs).logits
+
+        self.parent.assertTrue(torch.allclose(autocast_logits.float(), sdpa_autocast_logits.float(), atol=5e-2))
+
 
 @require_torch
 class BlenderbotModelTest(ModelTesterMixin, GenerationTesterMixin, unittest.TestCase):
@@ -222,6 +287,10 @@ class BlenderbotModelTest(ModelTesterMixin, GenerationTesterMixin, unittest.Test
     def test_config(self):
         self.config_tester.run_common_tests()
 
+    def test_config_invalid_attn_implementation(self):
+        with self.assertRaises(ValueError):
+            BlenderbotConfig(attn_implementation="flash")
+
     def test_save_load_strict(self):
         config, inputs_dict = self.model_tester.prepare_config_and_inputs()
         for model_class in self.all_model_classes:
@@ -250,6 +319,16 @@ class BlenderbotModelTest(ModelTesterMixin, GenerationTesterMixin, unittest.Test
         model.generate(input_ids, attention_mask=attention_mask)
         model.generate(num_beams=4, do_sample=True, early_stopping=False, num_return_sequences=3)
 
+    def test_model_forward_after_dtype_cast(self):
+        config_and_inputs = self.model_tester.prepare_config_and_inputs_for_common()
+        self.model_tester.check_model_forward_after_dtype_cast(*config_and_inputs)
+
+    def test_sdpa_attention_matches_eager(self):
+        if not hasattr(torch.nn.functional, "scaled_dot_product_attention"):
+            self.skipTest("scaled_dot_product_attention requires PyTorch >= 2.0")
+        config_and_inputs = self.model_tester.prepare_config_and_inputs_for_common()
+        self.model_tester.check_sdpa_attention_matches_eager(*config_and_inputs)
+
 
 def assert_tensors_close(a, b, atol=1e-12, prefix=""):
     """If tensors have different shapes, different values or a and b are not both tensors, raise a nice Assertion error."""